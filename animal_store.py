@@ -0,0 +1,161 @@
+# animal_store.py
+from array import array
+from typing import Dict, List
+from meta import EcosystemRegistry
+from time_1 import DAY_TIMES
+from logging import Logger
+
+logger = Logger()
+
+# Битовые флаги состояния животного в столбце flags
+F_ACTIVE = 1
+F_HUNGRY = 2
+F_PREDATORY = 4
+F_AGGRESSIVE = 8
+
+HUNGRY_THRESHOLD = 30
+HUNGRY_SPEED = 50
+FED_SPEED = 100
+
+
+# Числовое состояние всех животных мира в виде параллельных массивов (SoA).
+# Экземпляр животного хранит свое хранилище и индекс своей строки в нем.
+class AnimalStore:
+    # Столбцы состояния, которые сохраняются при перемотке
+    COLUMNS = ('position_x', 'position_y', 'food', 'speed', 'flags', 'group_id')
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.size = 0  # Граница занятых строк (все индексы < size)
+        self._free: List[int] = []
+        # Освобожденные за текущий тик строки: удаленное животное еще может
+        # оставаться в снимке списка сущностей до конца тика
+        self._pending: List[int] = []
+
+        self.position_x = array('h', [0]) * capacity
+        self.position_y = array('h', [0]) * capacity
+        self.food = array('i', [0]) * capacity
+        self.speed = array('h', [0]) * capacity
+        self.flags = array('B', [0]) * capacity
+        self.group_id = array('i', [0]) * capacity
+        self.kind = array('b', [-1]) * capacity  # -1 - свободная строка
+        self._next_group_id = 0
+        # Таблица активности: для каждого типа животного - флаг на каждое время суток
+        self._active_table: List[tuple] = []
+
+    def _grow(self):
+        """Удваивает размер массивов"""
+        extra = self.capacity
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column.extend(array(column.typecode, [0]) * extra)
+        self.kind.extend(array('b', [-1]) * extra)
+        self.capacity += extra
+
+    def claim(self, kind: int) -> int:
+        """Занимает свободную строку и возвращает её индекс"""
+        if self._free:
+            idx = self._free.pop()
+        else:
+            if self.size == self.capacity:
+                self._grow()
+            idx = self.size
+            self.size += 1
+        self.kind[idx] = kind
+        self.flags[idx] = 0
+        self.group_id[idx] = self.new_group_id()
+        return idx
+
+    def new_group_id(self) -> int:
+        """Выдает новый уникальный идентификатор группы"""
+        self._next_group_id += 1
+        return self._next_group_id
+
+    def release(self, idx: int):
+        """Освобождает строку животного, удаленного из мира"""
+        self.kind[idx] = -1
+        self._pending.append(idx)
+
+    def adopt(self, animal):
+        """Переносит состояние животного из другого хранилища в новую строку этого
+
+        Животное получает новый идентификатор группы этого хранилища, чтобы
+        не совпасть с группами, уже выданными здесь.
+        """
+        source = animal._store
+        old_idx = animal._idx
+        idx = self.claim(source.kind[old_idx])
+        for name in self.COLUMNS:
+            if name != 'group_id':
+                getattr(self, name)[idx] = getattr(source, name)[old_idx]
+        # Старая строка больше никому не принадлежит и сразу освобождается
+        source.kind[old_idx] = -1
+        source._free.append(old_idx)
+        animal._store = self
+        animal._idx = idx
+
+    def recycle(self):
+        """Делает строки, освобожденные на прошлом тике, доступными для повторного использования"""
+        self._free.extend(self._pending)
+        self._pending.clear()
+
+    def snapshot(self, rows: List[int]) -> Dict[str, array]:
+        """Копирует состояние указанных строк в компактные массивы"""
+        snapshot = {}
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            snapshot[name] = array(column.typecode, [column[i] for i in rows])
+        return snapshot
+
+    def restore(self, animals: List, snapshot: Dict[str, array]):
+        """Размещает животных в новых строках и записывает в них сохраненное состояние"""
+        for animal in animals:
+            animal._store = self
+            animal._idx = self.claim(animal._kind)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            saved = snapshot[name]
+            for j, animal in enumerate(animals):
+                column[animal._idx] = saved[j]
+
+    def _active_by_kind(self) -> List[tuple]:
+        """Возвращает таблицу активности, дополняя её для новых типов"""
+        kinds = EcosystemRegistry.kinds
+        table = self._active_table
+        for entity_class in kinds[len(table):]:
+            mask = getattr(entity_class, "_active_mask", 0)
+            table.append(tuple(bool(mask >> time_idx & 1) for time_idx in range(len(DAY_TIMES))))
+        return table
+
+    def update_tick(self, time_idx: int):
+        """Пересчитывает активность, голод и скорость всех животных за один проход"""
+        active_table = self._active_by_kind()
+        food = self.food
+        flags = self.flags
+        speed = self.speed
+        kind = self.kind
+
+        for i in range(self.size):
+            k = kind[i]
+            if k < 0:
+                continue
+            f = flags[i]
+            active = active_table[k][time_idx]
+            if active != bool(f & F_ACTIVE):
+                f ^= F_ACTIVE
+                if logger.enabled:
+                    logger.log_console("%s теперь %s", EcosystemRegistry.kinds[k]._type_name,
+                                       "активен" if active else "неактивен")
+            hungry = food[i] < HUNGRY_THRESHOLD
+            if hungry != bool(f & F_HUNGRY):
+                f ^= F_HUNGRY
+                if logger.enabled:
+                    logger.log_console("%s %s", EcosystemRegistry.kinds[k]._type_name,
+                                       "проголодался" if hungry else "не голоден")
+            flags[i] = f
+            speed[i] = HUNGRY_SPEED if hungry else FED_SPEED
+
+
+# Хранилище животных, еще не добавленных в мир; World.add_entity переносит
+# животное в собственное хранилище мира
+store = AnimalStore()
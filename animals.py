@@ -2,13 +2,52 @@
 from typing import List, Tuple
 import random
 from abc import abstractmethod
-from meta import EvalAnimalMeta, EcosystemRegistry
+from meta import EvalAnimalMeta, EcosystemRegistry, DEFAULT_ACTIVE_TIMES
+from animal_store import (
+    store, F_ACTIVE, F_HUNGRY, F_PREDATORY, F_AGGRESSIVE,
+    HUNGRY_THRESHOLD, HUNGRY_SPEED, FED_SPEED
+)
+from time_1 import TIME_BITS
 from logging import Logger
 
 logger = Logger()
 
+# Функции общего генератора random, привязанные один раз для горячих путей.
+# Последовательность чисел та же, что и при вызовах через модуль
+_random = random.random
+_randrange = random.randrange
+_getrandbits = random.getrandbits
+
+# Все ненулевые направления движения на один шаг
+_MOVES = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def _flag_property(bit: int) -> property:
+    """Создает свойство, читающее и пишущее один бит столбца flags"""
+    def getter(self) -> bool:
+        return bool(self._store.flags[self._idx] & bit)
+
+    def setter(self, value: bool):
+        if value:
+            self._store.flags[self._idx] |= bit
+        else:
+            self._store.flags[self._idx] &= ~bit
+
+    return property(getter, setter)
+
+
 # Базовый класс для всех животных с метаклассом
 class Animal(metaclass=EvalAnimalMeta):
+    # Числовое состояние хранится в хранилище animal_store, экземпляр держит
+    # только ссылку на хранилище и индекс строки в нем
+    __slots__ = ('_store', '_idx', 'group', 'group_index')
+
+    vision_radius: int = 3
+    active_times: List[str] = DEFAULT_ACTIVE_TIMES
+    eat_behavior: dict = {}
+    # Таблица поведения при еде, собирается при первом вызове eat
+    _eat_table = None
+
     def __init__(
         self,
         position: List[int],
@@ -17,6 +56,9 @@ class Animal(metaclass=EvalAnimalMeta):
         is_active: bool = True,
         is_hungry: bool = False
     ):
+        # До добавления в мир состояние живет в общем хранилище
+        self._store = store
+        self._idx = store.claim(self.__class__._kind)
         self.position = position
         self.speed = speed
         self.food = food
@@ -25,6 +67,45 @@ class Animal(metaclass=EvalAnimalMeta):
         self.group: List[Animal] = [self]
         self._register_in_world()
 
+    @property
+    def position(self) -> List[int]:
+        store = self._store
+        return [store.position_x[self._idx], store.position_y[self._idx]]
+
+    @position.setter
+    def position(self, value: List[int]):
+        store = self._store
+        store.position_x[self._idx], store.position_y[self._idx] = value
+
+    @property
+    def group_id(self) -> int:
+        return self._store.group_id[self._idx]
+
+    @group_id.setter
+    def group_id(self, value: int):
+        self._store.group_id[self._idx] = value
+
+    @property
+    def food(self) -> int:
+        return self._store.food[self._idx]
+
+    @food.setter
+    def food(self, value: int):
+        self._store.food[self._idx] = value
+
+    @property
+    def speed(self) -> int:
+        return self._store.speed[self._idx]
+
+    @speed.setter
+    def speed(self, value: int):
+        self._store.speed[self._idx] = value
+
+    is_active = _flag_property(F_ACTIVE)
+    is_hungry = _flag_property(F_HUNGRY)
+    _is_predatory = _flag_property(F_PREDATORY)
+    _is_aggressive = _flag_property(F_AGGRESSIVE)
+
     def _register_in_world(self):
         """Регистрация в глобальных группах"""
         if not hasattr(self.__class__, "groups"):
@@ -32,17 +113,33 @@ class Animal(metaclass=EvalAnimalMeta):
             
         self.__class__.groups.append(self.group)
         self.group_index = len(self.__class__.groups) - 1
-        logger.log_console(
-            f"Создан {self.__class__.__name__}. Позиция: {self.position}. Группа: {self.group_index}"
-        )
+        if logger.enabled:
+            logger.log_console("Создан %s. Позиция: %s. Группа: %d",
+                               self._type_name, self.position, self.group_index)
 
     def _generate_move_delta(self) -> Tuple[int, int]:
         """Генерирует направление движения"""
-        while True:
-            dx = random.randint(-1, 1)
-            dy = random.randint(-1, 1)
-            if dx != 0 or dy != 0:
-                return dx, dy
+        return _MOVES[_getrandbits(3)]
+
+    def move(self, world) -> bool:
+        """Перемещает животное на соседнюю клетку, читая состояние прямо из столбцов хранилища"""
+        store = self._store
+        idx = self._idx
+        if not store.flags[idx] & F_ACTIVE or _randrange(100) >= store.speed[idx]:
+            return False
+
+        # Генерируем направление движения одним выбором из восьми
+        dx, dy = _MOVES[_getrandbits(3)]
+
+        new_x = store.position_x[idx] + dx
+        new_y = store.position_y[idx] + dy
+        # Выход за границы мира проверяет сам world.relocate_unit
+        if world.relocate_unit(self, [new_x, new_y]):
+            # Уменьшаем количество пищи
+            food = store.food
+            food[idx] = max(0, food[idx] - 1)
+            return True
+        return False
 
     def decrease_food(self):
         """Уменьшает количество пищи"""
@@ -50,61 +147,99 @@ class Animal(metaclass=EvalAnimalMeta):
 
     def change_hungry_status(self):
         """Изменяет статус голода в зависимости от количества пищи"""
-        new_status = self.food < 30
+        new_status = self.food < HUNGRY_THRESHOLD
         if new_status != self.is_hungry:
             self.is_hungry = new_status
-            status = "проголодался" if new_status else "не голоден"
-            logger.log_console(f"{self.__class__.__name__} {status}")
+            if logger.enabled:
+                logger.log_console("%s %s", self._type_name,
+                                   "проголодался" if new_status else "не голоден")
 
     def change_speed_status(self):
         """Изменяет скорость в зависимости от статуса голода"""
-        self.speed = 50 if self.is_hungry else 100
+        self.speed = HUNGRY_SPEED if self.is_hungry else FED_SPEED
 
     def try_reproduce(self, world):
         """Пытается размножиться в зависимости от вероятности"""
-        if random.random() < self.reproduction_probability():
+        if _random() < self.reproduction_probability():
             self.reproduce(world)
 
-    def update_state(self, world, day_time: str):
-        """Обновляет состояние животного"""
-        self.change_active_status(day_time)
-        self.change_hungry_status()
-        self.change_speed_status()
+    def update_state(self, world, time_idx: int):
+        """Обновляет состояние животного
 
+        Активность, голод и скорость пересчитываются заранее для всех
+        животных сразу в World.process_tick (World.store.update_tick).
+        """
         self.check_self_modification()
 
         if self.is_active:
             self.try_merge_groups(world)
+            # Объединение могло убрать из мира группу вместе с самим животным
+            if not world.has_entity(self):
+                return
             self.move(world)
-            self.eat(world, day_time)
+            self.eat(world, time_idx)
             self.try_reproduce(world)
 
     def check_self_modification(self):
         """Проверяет и модифицирует животное при необходимости"""
         pass  # Переопределяется в подклассах
 
-    @abstractmethod
-    def eat(self, world, day_time: str) -> None:
-        """Метод поедания пищи"""
-        pass
+    def eat(self, world, time_idx: int) -> bool:
+        """Поедает ближайшую цель согласно eat_behavior класса"""
+        if not self.is_active:
+            return False
+
+        # Таблица поведения собирается при первом вызове, когда все классы
+        # целей уже зарегистрированы
+        cls = self.__class__
+        table = cls._eat_table
+        if table is None:
+            table = cls._eat_table = EvalAnimalMeta._compile_eat_behavior(cls)
+        behavior = table[time_idx]
+        target_types = behavior.target_types
+        targets = behavior.targets
+        # Вероятность поедания не меняется внутри цикла
+        eat_chance = behavior.hungry_probability if self.is_hungry else behavior.probability
+
+        for target in world.get_nearby_objects(self.position, behavior.radius):
+            # Проверяем, подходит ли цель для поедания; точный тип - самый частый случай
+            if type(target) in target_types or isinstance(target, targets):
+                if _random() < eat_chance:
+                    world.delete_unit(target)
+                    self.food += behavior.food_values.get(type(target), 30)
+                    if logger.enabled:
+                        logger.log_console("%s съел %s", self._type_name, target._type_name)
+                    return True
+
+        return False
 
-    @abstractmethod
     def change_active_status(self, day_time: str) -> None:
-        """Метод изменения статуса активности"""
-        pass
+        """Изменяет статус активности в зависимости от времени суток"""
+        new_status = bool(self._active_mask & TIME_BITS[day_time])
+        if new_status != self.is_active:
+            self.is_active = new_status
+            if logger.enabled:
+                logger.log_console("%s теперь %s", self._type_name,
+                                   "активен" if new_status else "неактивен")
 
     @abstractmethod
     def reproduction_probability(self) -> float:
         """Метод определения вероятности размножения"""
         pass
 
-    @abstractmethod
-    def reproduce(self, world):
-        """Метод размножения"""
-        pass
+    def reproduce(self, world) -> bool:
+        """Размещает потомка на свободной соседней клетке"""
+        new_pos = world.pick_free_adjacent_cell(self.position)
+        if new_pos is not None:
+            world.add_entity(self.__class__(new_pos))
+            if logger.enabled:
+                logger.log_console("%s размножился на позиции %s", self._type_name, new_pos)
+            return True
+        return False
 
 
 class GroupBehaviorMixin:
+    __slots__ = ()
     groups: List[List[Animal]] = []
 
     def try_merge_groups(self, world) -> None:
@@ -113,13 +248,15 @@ class GroupBehaviorMixin:
         for entity in nearby_entities:
             if isinstance(entity, self.__class__) and \
                entity is not self and \
-               random.random() < 0.25:
+               _random() < 0.25:
                 
                 self.group.extend(entity.group)
                 for member in entity.group:
                     member.group = self.group
+                    member.group_id = self.group_id
                 world.remove_group(entity.group)
-                logger.log_console(f"Группы объединены. Новая группа: {len(self.group)} особей")
+                if logger.enabled:
+                    logger.log_console("Группы объединены. Новая группа: %d особей", len(self.group))
                 break
 
     def _distance_to(self, other: Animal) -> int:
@@ -128,6 +265,8 @@ class GroupBehaviorMixin:
 
 
 class Malheureux(Animal, GroupBehaviorMixin):
+    __slots__ = ()
+
     # Регистрация групп через метакласс
     groups: List[List[Animal]] = []
     
@@ -138,7 +277,7 @@ class Malheureux(Animal, GroupBehaviorMixin):
     eat_behavior = {
         "morning": {
             "radius": 2,
-            "target_classes": [], 
+            "target_classes": ["Demi", "Obscurite", "Pauvre"],
             "probability": 0.25,
             "hungry_multiplier": 2.0,
             "food_values": {
@@ -149,7 +288,7 @@ class Malheureux(Animal, GroupBehaviorMixin):
         },
         "evening": {
             "radius": 2,
-            "target_classes": [],  # Будет заполнено в __init__
+            "target_classes": ["Demi", "Obscurite", "Pauvre"],
             "probability": 0.25,
             "hungry_multiplier": 1.5,
             "food_values": {
@@ -160,7 +299,7 @@ class Malheureux(Animal, GroupBehaviorMixin):
         },
         "default": {
             "radius": 2,
-            "target_classes": [],  # Будет заполнено в __init__
+            "target_classes": ["Demi", "Obscurite", "Pauvre"],
             "probability": 0.1,
             "hungry_multiplier": 1.0,
             "food_values": {
@@ -174,19 +313,6 @@ class Malheureux(Animal, GroupBehaviorMixin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.speed = 100
-        
-        # Получаем классы целей из реестра
-        target_classes = [
-            EcosystemRegistry.get_plant_class("Demi"),
-            EcosystemRegistry.get_plant_class("Obscurite"),
-            EcosystemRegistry.get_animal_class("Pauvre")
-        ]
-        
-        # Если классы уже зарегистрированы, добавляем их
-        if None not in target_classes:
-            # Обновляем поведение при поедании пищи
-            for time_key in self.__class__.eat_behavior:
-                self.__class__.eat_behavior[time_key]["target_classes"] = target_classes
 
     def reproduction_probability(self) -> float:
         """Определяет вероятность размножения в зависимости от размера группы"""
@@ -194,28 +320,34 @@ class Malheureux(Animal, GroupBehaviorMixin):
 
     def check_self_modification(self):
         """Проверяет и модифицирует животное при необходимости"""
-        if len(self.group) > 5 and not hasattr(self, "_is_predatory"):
+        if len(self.group) > 5 and not self._is_predatory:
             self._is_predatory = True
-            self.make_predatory_merge()
-
-    def make_predatory_merge(self):
-        """Модифицирует метод объединения групп для более агрессивного поведения"""
-        def predatory_merge(world):
-            nearby_entities = world.get_nearby_objects(self.position, 2)
-            for entity in nearby_entities:
-                if isinstance(entity, self.__class__) and entity is not self:
-                    if len(entity.group) < 3:
-                        self.group.extend(entity.group)
-                        for member in entity.group:
-                            member.group = self.group
-                        world.remove_group(entity.group)
-                        logger.log_console(f"{self.__class__.__name__} агрессивно поглотил другую группу.")
-                        break
-        self.try_merge_groups = predatory_merge.__get__(self)
+
+    def try_merge_groups(self, world) -> None:
+        """Объединяет группы; хищная группа поглощает маленькие группы без случайности"""
+        if not self._is_predatory:
+            super().try_merge_groups(world)
+            return
+
+        nearby_entities = world.get_nearby_objects(self.position, 2)
+        for entity in nearby_entities:
+            if isinstance(entity, self.__class__) and entity is not self:
+                if len(entity.group) < 3:
+                    self.group.extend(entity.group)
+                    for member in entity.group:
+                        member.group = self.group
+                        member.group_id = self.group_id
+                    world.remove_group(entity.group)
+                    if logger.enabled:
+                        logger.log_console("%s агрессивно поглотил другую группу.",
+                                           self._type_name)
+                    break
 
 
 # Добавьте это в конец файла animals.py
 class Pauvre(Animal, GroupBehaviorMixin):
+    __slots__ = ()
+
     # Регистрация групп через метакласс
     groups: List[List[Animal]] = []
     
@@ -226,7 +358,7 @@ class Pauvre(Animal, GroupBehaviorMixin):
     eat_behavior = {
         "morning": {
             "radius": 2,
-            "target_classes": [],  # Будет заполнено в __init__
+            "target_classes": ["Lumiere"],
             "probability": 0.33,
             "hungry_multiplier": 2.0,
             "food_values": {
@@ -235,7 +367,7 @@ class Pauvre(Animal, GroupBehaviorMixin):
         },
         "evening": {
             "radius": 2,
-            "target_classes": [],  # Будет заполнено в __init__
+            "target_classes": ["Lumiere"],
             "probability": 0.11,
             "hungry_multiplier": 1.0,
             "food_values": {
@@ -244,7 +376,7 @@ class Pauvre(Animal, GroupBehaviorMixin):
         },
         "default": {
             "radius": 2,
-            "target_classes": [],  # Будет заполнено в __init__
+            "target_classes": ["Lumiere"],
             "probability": 0.16,
             "hungry_multiplier": 1.0,
             "food_values": {
@@ -256,17 +388,6 @@ class Pauvre(Animal, GroupBehaviorMixin):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.speed = 50
-        
-        # Получаем классы целей из реестра
-        target_classes = [
-            EcosystemRegistry.get_plant_class("Lumiere")
-        ]
-        
-        # Если классы уже зарегистрированы, добавляем их
-        if None not in target_classes:
-            # Обновляем поведение при поедании пищи
-            for time_key in self.__class__.eat_behavior:
-                self.__class__.eat_behavior[time_key]["target_classes"] = target_classes
 
     def reproduction_probability(self) -> float:
         """Определяет вероятность размножения в зависимости от размера группы"""
@@ -274,23 +395,25 @@ class Pauvre(Animal, GroupBehaviorMixin):
 
     def check_self_modification(self):
         """Проверяет и модифицирует животное при необходимости"""
-        if self.is_hungry and self.food < 10 and not hasattr(self, "_is_aggressive"):
+        if self.is_hungry and self.food < 10 and not self._is_aggressive:
             self._is_aggressive = True
-            self.make_aggressive_eat()
-
-    def make_aggressive_eat(self):
-        """Модифицирует метод поедания пищи для более агрессивного поведения"""
-        def aggressive_eat(world, day_time):
-            if not self.is_active:
-                return
 
-            targets = world.get_nearby_objects(self.position, 2)
-            for target in targets:
-                if isinstance(target, (EcosystemRegistry.get_plant_class("Lumiere"), 
-                                       EcosystemRegistry.get_animal_class("Pauvre"))) and target is not self:
-                    if random.random() < 0.2:
-                        world.delete_unit(target)
-                        self.food += 20
-                        logger.log_console(f"{self.__class__.__name__} в агрессии съел {type(target).__name__}")
-                        break
-        self.eat = aggressive_eat.__get__(self)
\ No newline at end of file
+    def eat(self, world, time_idx: int):
+        """Поедание пищи; агрессивная особь ест и растения, и сородичей"""
+        if not self._is_aggressive:
+            return super().eat(world, time_idx)
+
+        if not self.is_active:
+            return
+
+        prey = (EcosystemRegistry.get_plant_class("Lumiere"), Pauvre)
+        targets = world.get_nearby_objects(self.position, 2)
+        for target in targets:
+            if isinstance(target, prey) and target is not self:
+                if _random() < 0.2:
+                    world.delete_unit(target)
+                    self.food += 20
+                    if logger.enabled:
+                        logger.log_console("%s в агрессии съел %s",
+                                           self._type_name, target._type_name)
+                    break
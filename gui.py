@@ -3,10 +3,9 @@ import PySimpleGUI as sg
 import random
 from typing import List, Dict, Any, Optional, Tuple
 from world import World
-from animals import Malheureux, Pauvre
-from plants import Lumiere, Obscurite, Demi
+from animals import Animal, Malheureux, Pauvre
+from plants import Plant, Lumiere, Obscurite, Demi
 from meta import EcosystemRegistry
-import math
 
 class EcosystemGUI:
     def __init__(self):
@@ -15,9 +14,15 @@ class EcosystemGUI:
         self.max_ticks = 200
         self.simulation_running = False
         self.selected_entity = None
+        # Словарь переиспользуется между кадрами, чтобы не создавать его заново
+        self.entity_figures: Dict[Any, Any] = {}
+        # Статистика текущего тика; сбрасывается при любом изменении мира
+        self._stats_cache_tick = -1
+        self._stats_cache: Optional[Dict[str, Any]] = None
         self.canvas_size = (800, 600)
         self.cell_size = min(self.canvas_size[0] // self.world.width, 
                            self.canvas_size[1] // self.world.height)
+        self._build_coords_tables()
         
         # История состояний для перемотки
         self.simulation_history = []
@@ -83,30 +88,23 @@ class EcosystemGUI:
 
     def save_state(self):
         """Сохраняет текущее состояние симуляции"""
+        entities = list(self.world.entities)
+        animals = [entity for entity in entities if isinstance(entity, Animal)]
+        plants = [entity for entity in entities if isinstance(entity, Plant)]
+        
+        # Числовое состояние животных копируется из общих массивов одним проходом;
+        # сами объекты сущностей сохраняются по ссылке и при перемотке не пересоздаются,
+        # поэтому изменяемые поля растений сохраняются отдельно
         state = {
             'tick': self.current_tick,
-            'time': self.world.time.current_time,
-            'entities': []
+            'time_idx': self.world.time.current_time_idx,
+            'entities': entities,
+            'animals': animals,
+            'animal_state': self.world.store.snapshot([animal._idx for animal in animals]),
+            'plants': plants,
+            'plant_state': [(plant.failed_growth_ticks, plant._is_aggressive) for plant in plants]
         }
         
-        for entity in self.world.entities:
-            entity_data = {
-                'type': type(entity).__name__,
-                'position': entity.position.copy(),
-                'class': type(entity)
-            }
-            
-            # Дополнительные данные для животных
-            if hasattr(entity, 'food'):
-                entity_data.update({
-                    'food': entity.food,
-                    'is_active': entity.is_active,
-                    'is_hungry': entity.is_hungry,
-                    'speed': entity.speed
-                })
-            
-            state['entities'].append(entity_data)
-        
         # Ограничиваем историю для экономии памяти
         if len(self.simulation_history) >= self.max_ticks:
             self.simulation_history.pop(0)
@@ -120,40 +118,41 @@ class EcosystemGUI:
             
         state = self.simulation_history[tick]
         
-        # Очищаем текущий мир
-        self.world.entities.clear()
-        self.world.matrix = [[None for _ in range(self.world.width)] 
-                            for _ in range(self.world.height)]
+        # Освобождаем строки состояния животных текущего мира
+        for entity in self.world.entities:
+            if isinstance(entity, Animal):
+                self.world.store.release(entity._idx)
         
-        # Восстанавливаем сущности
-        for entity_data in state['entities']:
-            entity_class = entity_data['class']
-            entity = entity_class(entity_data['position'])
-            
-            # Восстанавливаем дополнительные данные для животных
-            if hasattr(entity, 'food'):
-                entity.food = entity_data.get('food', 100)
-                entity.is_active = entity_data.get('is_active', True)
-                entity.is_hungry = entity_data.get('is_hungry', False)
-                entity.speed = entity_data.get('speed', 50)
-            
-            self.world.entities.append(entity)
-            x, y = entity.position
-            if 0 <= x < self.world.height and 0 <= y < self.world.width:
-                self.world.matrix[x][y] = entity
+        # Восстанавливаем состояние животных, затем сущности и матрицу мира
+        self.world.store.restore(state['animals'], state['animal_state'])
+        self.world.reset_entities(state['entities'])
+        
+        # Списки групп собираются заново по восстановленным идентификаторам групп
+        groups: Dict[int, List[Animal]] = {}
+        for animal in state['animals']:
+            animal.group = groups.setdefault(animal.group_id, [])
+            animal.group.append(animal)
+        
+        for plant, (failed_growth_ticks, is_aggressive) in zip(state['plants'], state['plant_state']):
+            plant.failed_growth_ticks = failed_growth_ticks
+            plant._is_aggressive = is_aggressive
         
         self.current_tick = state['tick']
         # Установка времени суток
-        time_cycle = ["morning", "day", "evening", "night"]
-        if state['time'] in time_cycle:
-            self.world.time.current_time = state['time']
-            self.world.time.tick_counter = time_cycle.index(state['time'])
+        self.world.time.set_time_idx(state['time_idx'])
+        self._stats_cache_tick = -1
+
+    def _build_coords_tables(self):
+        """Предвычисляет координаты canvas для каждой строки и столбца мира"""
+        half_cell = self.cell_size // 2
+        self._canvas_x = [world_y * self.cell_size + half_cell
+                          for world_y in range(self.world.width)]
+        self._canvas_y = [self.canvas_size[1] - (world_x * self.cell_size + half_cell)
+                          for world_x in range(self.world.height)]
 
     def world_to_canvas_coords(self, world_x: int, world_y: int) -> Tuple[int, int]:
         """Преобразует координаты мира в координаты canvas"""
-        canvas_x = world_y * self.cell_size + self.cell_size // 2
-        canvas_y = self.canvas_size[1] - (world_x * self.cell_size + self.cell_size // 2)
-        return canvas_x, canvas_y
+        return self._canvas_x[world_y], self._canvas_y[world_x]
 
     def canvas_to_world_coords(self, canvas_x: int, canvas_y: int) -> Tuple[int, int]:
         """Преобразует координаты canvas в координаты мира"""
@@ -161,40 +160,55 @@ class EcosystemGUI:
         world_x = int((self.canvas_size[1] - canvas_y) // self.cell_size)
         return world_x, world_y
 
+    def _draw_plants(self, entities, fill_color, line_color, figures):
+        """Рисует растения одного типа квадратами"""
+        draw_rectangle = self.graph.draw_rectangle
+        canvas_x = self._canvas_x
+        canvas_y = self._canvas_y
+        for entity in entities:
+            world_x, world_y = entity.position
+            x = canvas_x[world_y]
+            y = canvas_y[world_x]
+            figure = draw_rectangle((x-8, y-8), (x+8, y+8), 
+                                    fill_color=fill_color, line_color=line_color)
+            if figure:
+                figures[figure] = entity
+
+    def _draw_animals(self, entities, fill_color, line_color, figures):
+        """Рисует животных одного типа кругами"""
+        draw_circle = self.graph.draw_circle
+        canvas_x = self._canvas_x
+        canvas_y = self._canvas_y
+        for entity in entities:
+            world_x, world_y = entity.position
+            # Размер пропорционален "масштабу" (количеству особей в группе)
+            radius = max(6, min(15, 6 + len(entity.group)))
+            figure = draw_circle((canvas_x[world_y], canvas_y[world_x]), radius, 
+                                 fill_color=fill_color, line_color=line_color)
+            if figure:
+                figures[figure] = entity
+
+    def draw_entities(self, entities, figures: Dict[Any, Any] = None) -> Dict[Any, Any]:
+        """Рисует сущности на карте партиями по типу и заполняет словарь фигура -> сущность"""
+        by_kind = [[] for _ in _DRAW_DISPATCH]
+        for entity in entities:
+            by_kind[entity._kind].append(entity)
+        
+        if figures is None:
+            figures = {}
+        for style, batch in zip(_DRAW_DISPATCH, by_kind):
+            if style is not None and batch:
+                draw, fill_color, line_color = style
+                draw(self, batch, fill_color, line_color, figures)
+        return figures
+
     def draw_entity(self, entity):
         """Рисует сущность на карте"""
-        x, y = self.world_to_canvas_coords(entity.position[0], entity.position[1])
-        
-        # Цвета и формы для разных типов
-        if isinstance(entity, Lumiere):
-            return self.graph.draw_rectangle((x-8, y-8), (x+8, y+8), 
-                                           fill_color='#FFFF00', line_color='#CCCC00')
-        elif isinstance(entity, Obscurite):
-            return self.graph.draw_rectangle((x-8, y-8), (x+8, y+8), 
-                                           fill_color='#0000FF', line_color='#0000CC')
-        elif isinstance(entity, Demi):
-            return self.graph.draw_rectangle((x-8, y-8), (x+8, y+8), 
-                                           fill_color='#808080', line_color='#606060')
-        elif isinstance(entity, Malheureux):
-            # Размер пропорционален "масштабу" (количеству особей в группе)
-            group_size = len(getattr(entity, 'group', [entity]))
-            radius = max(6, min(15, 6 + group_size))
-            return self.graph.draw_circle((x, y), radius, 
-                                        fill_color='#800080', line_color='#600060')
-        elif isinstance(entity, Pauvre):
-            group_size = len(getattr(entity, 'group', [entity]))
-            radius = max(6, min(15, 6 + group_size))
-            return self.graph.draw_circle((x, y), radius, 
-                                        fill_color='#FFFF00', line_color='#CCCC00')
-        
-        return None
+        figures = self.draw_entities([entity])
+        return next(iter(figures), None)
 
     def draw_vision_radius(self, entity):
         """Рисует радиус обзора животного"""
-        if not hasattr(entity, 'vision_radius'):
-            # Добавляем vision_radius, если его нет
-            entity.vision_radius = 3
-            
         x, y = self.world_to_canvas_coords(entity.position[0], entity.position[1])
         vision_pixels = entity.vision_radius * self.cell_size
         
@@ -212,18 +226,14 @@ class EcosystemGUI:
             self.graph.draw_line((0, i), (self.canvas_size[0], i), color='#333333')
         
         # Рисуем сущности
-        entity_figures = {}
-        for entity in self.world.entities:
-            figure = self.draw_entity(entity)
-            if figure:
-                entity_figures[figure] = entity
+        self.entity_figures.clear()
+        self.draw_entities(self.world.entities, self.entity_figures)
         
         # Рисуем радиус обзора для выбранной сущности
-        if self.selected_entity and self.selected_entity in self.world.entities:
-            if hasattr(self.selected_entity, 'vision_radius'):
+        if self.selected_entity and self.world.has_entity(self.selected_entity):
+            if isinstance(self.selected_entity, Animal):
                 self.draw_vision_radius(self.selected_entity)
         
-        self.entity_figures = entity_figures
         self.update_statistics()
 
     def update_statistics(self):
@@ -244,47 +254,45 @@ class EcosystemGUI:
         stats_text += f"Groups: Malheureux({stats.get('malheureux_groups', 0)}), "
         stats_text += f"Pauvre({stats.get('pauvre_groups', 0)})\n"
         
-        active_animals = sum(1 for e in self.world.entities 
-                           if hasattr(e, 'is_active') and e.is_active)
-        stats_text += f"Active Animals: {active_animals}"
+        stats_text += f"Active Animals: {stats['active_animals']}"
         
         self.window['-STATS-'].update(stats_text)
 
     def calculate_statistics(self) -> Dict[str, Any]:
-        """Вычисляет статистику мира"""
-        stats = {
-            'total': len(self.world.entities),
-            'Lumiere': 0, 'Obscurite': 0, 'Demi': 0,
-            'Malheureux': 0, 'Pauvre': 0
-        }
+        """Вычисляет статистику мира (один раз за тик)"""
+        if self._stats_cache_tick == self.current_tick:
+            return self._stats_cache
+        
+        # Подсчет по числовому типу сущности вместо сравнения имен классов
+        counts = [0] * len(EcosystemRegistry.kinds)
+        malheureux_kind = Malheureux._kind
+        pauvre_kind = Pauvre._kind
         
         malheureux_visions = []
         pauvre_visions = []
-        malheureux_groups_set = set()
-        pauvre_groups_set = set()
+        # Группы считаются по идентификаторам групп животных текущего мира
+        group_id = self.world.store.group_id
+        malheureux_groups = set()
+        pauvre_groups = set()
+        active_animals = 0
         
         for entity in self.world.entities:
-            entity_type = type(entity).__name__
-            if entity_type in stats:
-                stats[entity_type] += 1
+            kind = entity._kind
+            counts[kind] += 1
+            if isinstance(entity, Animal) and entity.is_active:
+                active_animals += 1
             
             # Собираем данные о радиусе обзора
-            if hasattr(entity, 'vision_radius'):
-                if isinstance(entity, Malheureux):
-                    malheureux_visions.append(entity.vision_radius)
-                    if hasattr(entity, 'group'):
-                        malheureux_groups_set.add(id(entity.group))
-                elif isinstance(entity, Pauvre):
-                    pauvre_visions.append(entity.vision_radius)
-                    if hasattr(entity, 'group'):
-                        pauvre_groups_set.add(id(entity.group))
-            else:
-                # Добавляем vision_radius, если его нет
-                entity.vision_radius = 3
-                if isinstance(entity, Malheureux):
-                    malheureux_visions.append(3)
-                elif isinstance(entity, Pauvre):
-                    pauvre_visions.append(3)
+            if kind == malheureux_kind:
+                malheureux_visions.append(entity.vision_radius)
+                malheureux_groups.add(group_id[entity._idx])
+            elif kind == pauvre_kind:
+                pauvre_visions.append(entity.vision_radius)
+                pauvre_groups.add(group_id[entity._idx])
+        
+        stats = {'total': len(self.world.entities), 'active_animals': active_animals}
+        for entity_class in (Lumiere, Obscurite, Demi, Malheureux, Pauvre):
+            stats[entity_class.__name__] = counts[entity_class._kind]
         
         # Вычисляем средние значения
         if malheureux_visions:
@@ -292,9 +300,11 @@ class EcosystemGUI:
         if pauvre_visions:
             stats['pauvre_avg_vision'] = sum(pauvre_visions) / len(pauvre_visions)
             
-        stats['malheureux_groups'] = len(malheureux_groups_set)
-        stats['pauvre_groups'] = len(pauvre_groups_set)
+        stats['malheureux_groups'] = len(malheureux_groups)
+        stats['pauvre_groups'] = len(pauvre_groups)
         
+        self._stats_cache = stats
+        self._stats_cache_tick = self.current_tick
         return stats
 
     def update_entity_info(self, entity):
@@ -303,32 +313,31 @@ class EcosystemGUI:
             self.window['-ENTITY_INFO-'].update("Click on an entity to see its info")
             return
         
-        info = f"=== {type(entity).__name__} ===\n"
+        info = f"=== {entity._type_name} ===\n"
         info += f"Position: {entity.position}\n"
         
-        if hasattr(entity, 'food'):
+        if isinstance(entity, Animal):
             info += f"Food: {entity.food}\n"
             info += f"Active: {entity.is_active}\n"
             info += f"Hungry: {entity.is_hungry}\n"
             info += f"Speed: {entity.speed}\n"
-            info += f"Vision Radius: {getattr(entity, 'vision_radius', 3)}\n"
-            
-            if hasattr(entity, 'group'):
-                info += f"Group Size: {len(entity.group)}\n"
+            info += f"Vision Radius: {entity.vision_radius}\n"
+            info += f"Group Size: {len(entity.group)}\n"
             
             # Информация об окружении
-            nearby = self.world.get_nearby_objects(entity.position, 
-                                                 getattr(entity, 'vision_radius', 3))
+            nearby = self.world.get_nearby_objects(entity.position, entity.vision_radius)
             info += f"Nearby Entities: {len(nearby)}\n"
             
             if nearby:
-                entity_counts = {}
+                # Гистограмма по числовому типу сущности
+                kinds = EcosystemRegistry.kinds
+                counts = [0] * len(kinds)
                 for nearby_entity in nearby:
-                    entity_type = type(nearby_entity).__name__
-                    entity_counts[entity_type] = entity_counts.get(entity_type, 0) + 1
+                    counts[nearby_entity._kind] += 1
                 
-                for entity_type, count in entity_counts.items():
-                    info += f"  {entity_type}: {count}\n"
+                for kind, count in enumerate(counts):
+                    if count:
+                        info += f"  {kinds[kind]._type_name}: {count}\n"
         
         self.window['-ENTITY_INFO-'].update(info)
 
@@ -339,15 +348,26 @@ class EcosystemGUI:
             
         # Найдем сущность в точке клика
         clicked_entity = None
-        min_distance = float('inf')
-        
-        for entity in self.world.entities:
-            entity_x, entity_y = self.world_to_canvas_coords(entity.position[0], entity.position[1])
-            distance = math.sqrt((mouse_pos[0] - entity_x)**2 + (mouse_pos[1] - entity_y)**2)
-            
-            if distance < 15 and distance < min_distance:  # 15 пикселей - радиус клика
-                clicked_entity = entity
-                min_distance = distance
+        min_distance_sq = float('inf')
+
+        # Проверяем только клетки матрицы мира в пределах радиуса клика,
+        # а не все сущности
+        click_x, click_y = self.canvas_to_world_coords(mouse_pos[0], mouse_pos[1])
+        reach = 15 // self.cell_size + 1
+        for x in range(max(0, click_x - reach), min(self.world.height, click_x + reach + 1)):
+            for y in range(max(0, click_y - reach), min(self.world.width, click_y + reach + 1)):
+                entity = self.world.entity_at(x, y)
+                if entity is None:
+                    continue
+                entity_x, entity_y = self.world_to_canvas_coords(x, y)
+                dx = mouse_pos[0] - entity_x
+                dy = mouse_pos[1] - entity_y
+                distance_sq = dx*dx + dy*dy
+
+                # 15 пикселей - радиус клика, сравниваем квадраты расстояний
+                if distance_sq < 225 and distance_sq < min_distance_sq:
+                    clicked_entity = entity
+                    min_distance_sq = distance_sq
         
         self.selected_entity = clicked_entity
         self.update_entity_info(clicked_entity)
@@ -360,6 +380,7 @@ class EcosystemGUI:
             
         self.world.process_tick()
         self.current_tick += 1
+        self._stats_cache_tick = -1
         self.save_state()
         return True
 
@@ -390,8 +411,10 @@ class EcosystemGUI:
                 
                 elif event == '-RESET-':
                     self.world = World(width=30, height=20, max_ticks=1000)
+                    self._build_coords_tables()
                     self.world.initialize_ecosystem()
                     self.current_tick = 0
+                    self._stats_cache_tick = -1
                     self.simulation_running = False
                     self.selected_entity = None
                     self.save_initial_state()
@@ -419,6 +442,20 @@ class EcosystemGUI:
             self.window.close()
 
 
+def _build_draw_dispatch():
+    """Строит таблицу отрисовки, индексированную числовым типом сущности"""
+    table = [None] * len(EcosystemRegistry.kinds)
+    table[Lumiere._kind] = (EcosystemGUI._draw_plants, '#FFFF00', '#CCCC00')
+    table[Obscurite._kind] = (EcosystemGUI._draw_plants, '#0000FF', '#0000CC')
+    table[Demi._kind] = (EcosystemGUI._draw_plants, '#808080', '#606060')
+    table[Malheureux._kind] = (EcosystemGUI._draw_animals, '#800080', '#600060')
+    table[Pauvre._kind] = (EcosystemGUI._draw_animals, '#FFFF00', '#CCCC00')
+    return tuple(table)
+
+
+_DRAW_DISPATCH = _build_draw_dispatch()
+
+
 if __name__ == "__main__":
     app = EcosystemGUI()
     app.run()
@@ -1,3 +1,8 @@
 class Logger:
-    def log_console(self, msg: str):
-        print(msg)
\ No newline at end of file
+    # Общий для всех логгеров флаг вывода
+    enabled = True
+
+    def log_console(self, msg: str, *args):
+        # Строка форматируется только если вывод включен
+        if self.enabled:
+            print(msg % args if args else msg)
@@ -8,7 +8,7 @@ class Logger:
         print(message)
 
 if __name__ == "__main__":
-    world = World(width=20, height=15, max_ticks=40)
+    world = World(width=20, height=15, max_ticks=40, tick_delay=1)
     
     world.run_simulation()
     
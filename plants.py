@@ -1,75 +1,117 @@
 # plants.py
-from typing import List
-from abc import abstractmethod
+from typing import List, Tuple
 import random
 from meta import EvalPlantMeta, EcosystemRegistry
+from time_1 import TIME_BITS
 from logging import Logger
 
 logger = Logger()
 
+# Функции общего генератора random, привязанные один раз для горячих путей
+_random = random.random
+
 # Базовый класс для всех растений с метаклассом
 class Plant(metaclass=EvalPlantMeta):
+    # Атрибуты экземпляра хранятся в слотах вместо __dict__
+    __slots__ = ('position', 'failed_growth_ticks', '_is_aggressive')
+
+    # Времена суток, в которые растение растет; метакласс строит из них _growth_mask
+    growth_time: List[str] = []
+
+    # Вероятности распространения; подклассы переопределяют их
+    aggressive_spread_chance: float = 0.25
+    default_spread_chance: float = 0.5
+
+    # Имена классов-конкурентов; классы находятся в реестре один раз на класс
+    competitor_names: Tuple[str, ...] = ()
+
     def __init__(self, position: List[int]):
         self.position = position.copy()
-        self.growth_time = []
-        self.competitors = []
         self.failed_growth_ticks = 0  # Счётчик неудачных попыток роста
-        logger.log_console(f"Создан {self.__class__.__name__}. Позиция: {self.position}")
+        self._is_aggressive = False
+        if logger.enabled:
+            logger.log_console("Создан %s. Позиция: %s", self._type_name, self.position)
 
-    @abstractmethod
     def can_grow(self, current_time: str) -> bool:
         """Определяет, может ли растение расти в текущее время суток"""
-        pass
+        return bool(self._growth_mask & TIME_BITS[current_time])
+
+    def try_spread(self, world) -> bool:
+        """Распространяет растение на свободную соседнюю клетку"""
+        new_pos = world.pick_free_adjacent_cell(self.position)
+        if new_pos is None:
+            return False
+
+        can_replace = self._can_replace(new_pos)
+
+        if self._is_aggressive:
+            # Агрессивное растение распространяется только с заменой конкурента
+            if can_replace and _random() < 0.75:  # Более высокая агрессия
+                world.add_entity(self.__class__([new_pos[0], new_pos[1]]))
+                if logger.enabled:
+                    logger.log_console("%s агрессивно распространился на %s", self._type_name, new_pos)
+                return True
+            return False
+
+        # Определяем вероятность распространения
+        if can_replace:
+            spread_chance = self.aggressive_spread_chance
+        else:
+            spread_chance = self.default_spread_chance
+
+        if _random() < spread_chance:
+            world.add_entity(self.__class__([new_pos[0], new_pos[1]]))
+            if logger.enabled:
+                logger.log_console("%s распространился на позицию %s", self._type_name, new_pos)
+            return True
+        return False
+
+    @classmethod
+    def _resolve_competitors(cls) -> tuple:
+        """Возвращает кортеж классов-конкурентов, кэшируя его на классе"""
+        competitors = cls._competitors
+        if competitors is None:
+            competitors = tuple(map(EcosystemRegistry.get_plant_class, cls.competitor_names))
+            # Пока не все классы зарегистрированы, конкурентов нет и кэш не заполняется
+            if None in competitors:
+                return ()
+            cls._competitors = competitors
+        return competitors
+
+    @property
+    def competitors(self) -> tuple:
+        return self._resolve_competitors()
 
     def _can_replace(self, other):
         """Проверяет, может ли растение заменить другое"""
-        return isinstance(other, tuple(self.competitors)) if other else False
+        return isinstance(other, self._resolve_competitors()) if other else False
 
-    def grow(self, world, day_time):
+    def grow(self, world, time_idx: int):
         """Метод роста растения"""
-        if self.can_grow(day_time):
+        if self._growth_mask >> time_idx & 1:
             self.failed_growth_ticks = 0
             self.try_spread(world)
         else:
             self.failed_growth_ticks += 1
 
-    def update_state(self, world, day_time):
+    def update_state(self, world, time_idx: int):
         """Обновление состояния растения"""
-        self.check_self_modification(day_time)
-        self.grow(world, day_time)
+        self.check_self_modification(time_idx)
+        self.grow(world, time_idx)
 
-    def check_self_modification(self, day_time):
+    def check_self_modification(self, time_idx: int):
         """Проверка и модификация растения при необходимости"""
-        if self.failed_growth_ticks >= 3 and not hasattr(self, "_is_aggressive"):
+        if self.failed_growth_ticks >= 3 and not self._is_aggressive:
+            # try_spread сам переходит на агрессивное поведение по флагу
             self._is_aggressive = True
-            self.make_aggressive_spread()
-
-    def make_aggressive_spread(self):
-        """Модификация метода распространения для более агрессивного поведения"""
-        # Новый метод распространения с более высокой вероятностью
-        def aggressive_spread(self, world):
-            target = world.get_free_adjacent_cells(self.position)
-            if target:
-                new_pos = random.choice(target)
-                if self._can_replace(new_pos):
-                    if random.random() < 0.75:  # Более высокая агрессия
-                        world.add_entity(self.__class__([new_pos[0], new_pos[1]]))
-                        logger.log_console(f"{self.__class__.__name__} агрессивно распространился на {new_pos}")
-                        return True
-                elif target is None:
-                    if random.random() < 0.9:
-                        world.add_entity(self.__class__([new_pos[0], new_pos[1]]))
-                        logger.log_console(f"{self.__class__.__name__} агрессивно распространился на {new_pos}")
-                        return True
-            return False
-
-        # Заменяем метод распространения
-        self.try_spread = aggressive_spread.__get__(self)
-        logger.log_console(f"{self.__class__.__name__} стал агрессивным в распространении")
+            if logger.enabled:
+                logger.log_console("%s стал агрессивным в распространении", self._type_name)
 
 
 # Растение света - активно днем
 class Lumiere(Plant):
+    __slots__ = ()
+
     # Определение поведения по времени суток через метаклассы
     time_behavior = {
         "day": {"active": True, "spread_chance": 0.4},
@@ -82,22 +124,16 @@ class Lumiere(Plant):
     aggressive_spread_chance = 0.4
     default_spread_chance = 0.25
     
-    def __init__(self, position: List[int]):
-        super().__init__(position)
-        self.growth_time = ["day"]
-        
-        # Получаем классы конкурентов из реестра
-        self.competitors = [
-            EcosystemRegistry.get_plant_class("Obscurite"),
-            EcosystemRegistry.get_plant_class("Demi")
-        ]
-        
-        # Если классы еще не зарегистрированы, используем строки
-        if None in self.competitors:
-            self.competitors = []
+    # Времена роста
+    growth_time = ["day"]
+    
+    # Конкуренты
+    competitor_names = ("Obscurite", "Demi")
 
 
 class Demi(Plant):
+    __slots__ = ()
+
     # Определение поведения по времени суток через метаклассы
     time_behavior = {
         "day": {"active": False, "spread_chance": 0.1},
@@ -110,22 +146,16 @@ class Demi(Plant):
     aggressive_spread_chance = 0.5
     default_spread_chance = 0.3
     
-    def __init__(self, position: List[int]):
-        super().__init__(position)
-        self.growth_time = ["morning", "evening"]
-        
-        # Получаем классы конкурентов из реестра
-        self.competitors = [
-            EcosystemRegistry.get_plant_class("Obscurite"),
-            EcosystemRegistry.get_plant_class("Lumiere")
-        ]
-        
-        # Если классы еще не зарегистрированы, используем строки
-        if None in self.competitors:
-            self.competitors = []
+    # Времена роста
+    growth_time = ["morning", "evening"]
+    
+    # Конкуренты
+    competitor_names = ("Obscurite", "Lumiere")
 
 
 class Obscurite(Plant):
+    __slots__ = ()
+
     # Определение поведения по времени суток через метаклассы
     time_behavior = {
         "day": {"active": False, "spread_chance": 0.0},
@@ -138,17 +168,8 @@ class Obscurite(Plant):
     aggressive_spread_chance = 0.6
     default_spread_chance = 0.35
     
-    def __init__(self, position: List[int]):
-        super().__init__(position)
-        self.growth_time = ["night"]
-        
-        # Получаем классы конкурентов из реестра
-        self.competitors = [
-            EcosystemRegistry.get_plant_class("Lumiere"),
-            EcosystemRegistry.get_plant_class("Demi")
-        ]
-        
-        # Если классы еще не зарегистрированы, используем строки
-        if None in self.competitors:
-            self.competitors = []
-            
\ No newline at end of file
+    # Времена роста
+    growth_time = ["night"]
+    
+    # Конкуренты
+    competitor_names = ("Lumiere", "Demi")
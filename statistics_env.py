@@ -1,13 +1,101 @@
 # stats.py
+import csv
+import math
+from array import array
+from collections.abc import Sequence
 from typing import Dict, List, Any, Tuple
 from animals import Animal, Malheureux, Pauvre
 from plants import Plant, Lumiere, Obscurite, Demi
+from animal_store import F_ACTIVE, F_HUNGRY
+from meta import EcosystemRegistry
+from time_1 import DAY_TIMES
+
+class _HistoryView(Sequence):
+    """Последовательность записей истории; словарь i-й записи собирается при обращении"""
+    
+    def __init__(self, stats: 'EcosystemStats'):
+        self._stats = stats
+    
+    def __len__(self) -> int:
+        return self._stats._n
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._stats._record(i) for i in range(*index.indices(len(self)))]
+        n = self._stats._n
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("history index out of range")
+        return self._stats._record(index)
+
 
 class EcosystemStats:
     """Класс для сбора и анализа статистики экосистемы"""
     
+    # Столбцы истории и типы их элементов; время суток хранится номером в DAY_TIMES
+    HISTORY_COLUMNS = {
+        'tick': 'i',
+        'time': 'b',
+        'total': 'i',
+        'plants': 'i',
+        'animals': 'i',
+        'growth_active': 'i',
+        'active_count': 'i',
+        'hungry_count': 'i',
+        'avg_food': 'd',
+        'avg_vision_radius': 'd',
+        'diversity': 'd'
+    }
+    
     def __init__(self):
-        self.history = []
+        # История хранится по столбцам, а не списком словарей на каждый тик
+        self._n = 0
+        self._columns: Dict[str, array] = {
+            name: array(typecode) for name, typecode in self.HISTORY_COLUMNS.items()
+        }
+        self._species_counts: Dict[str, array] = {}
+        # Число групп вида на каждом тике; 0 - у вида не было групп
+        self._group_counts: Dict[str, array] = {}
+    
+    @property
+    def history(self) -> Sequence:
+        """История в виде последовательности словарей статистики, собираемых по индексу"""
+        return _HistoryView(self)
+    
+    def _record(self, i: int) -> Dict[str, Any]:
+        """Восстанавливает словарь статистики для i-й записи истории"""
+        column = {name: values[i] for name, values in self._columns.items()}
+        return {
+            'tick': column['tick'],
+            'time': DAY_TIMES[column['time']],
+            'entities': {
+                'total': column['total'],
+                'plants': column['plants'],
+                'animals': column['animals']
+            },
+            'species_count': {
+                species: counts[i]
+                for species, counts in self._species_counts.items() if counts[i]
+            },
+            'animals_data': {
+                'active_count': column['active_count'],
+                'hungry_count': column['hungry_count'],
+                'avg_food': column['avg_food'],
+                'avg_vision_radius': column['avg_vision_radius'],
+                'group_stats': {
+                    species: {
+                        'group_count': group_counts[i],
+                        'individuals': self._species_counts[species][i]
+                    }
+                    for species, group_counts in self._group_counts.items() if group_counts[i]
+                }
+            },
+            'plants_data': {
+                'growth_active': column['growth_active']
+            },
+            '_diversity': column['diversity']
+        }
     
     def collect_stats(self, world, current_tick: int) -> Dict[str, Any]:
         """Собирает статистику о текущем состоянии мира"""
@@ -32,95 +120,153 @@ class EcosystemStats:
             }
         }
         
-        # Подсчет различных видов
-        animal_food_values = []
-        animal_vision_values = []
+        # Подсчет различных видов за один проход со скалярными накопителями.
+        # Числовое состояние животных читается прямо из столбцов хранилища мира
+        kinds = EcosystemRegistry.kinds
+        kind_counts = [0] * len(kinds)
+        food_sum = 0
+        animals_count = 0
+        plants_count = 0
+        growth_active = 0
         active_animals = 0
         hungry_animals = 0
+        time_bit = 1 << world.time.current_time_idx
+        # Животное или растение определяется по числовому типу, без обхода MRO
+        is_animal = [issubclass(entity_class, Animal) for entity_class in kinds]
+        is_plant = [issubclass(entity_class, Plant) for entity_class in kinds]
+        food = world.store.food
+        flags = world.store.flags
+        group_id = world.store.group_id
         
         # Статистика групп животных
         groups_by_species = {}
         
         for entity in world.entities:
-            species_name = type(entity).__name__
-            stats['species_count'][species_name] = stats['species_count'].get(species_name, 0) + 1
+            kind = entity._kind
+            kind_counts[kind] += 1
             
-            if isinstance(entity, Animal):
-                stats['entities']['animals'] += 1
-                animal_food_values.append(entity.food)
-                
-                # Добавляем vision_radius если его нет
-                if not hasattr(entity, 'vision_radius'):
-                    entity.vision_radius = 3
-                animal_vision_values.append(entity.vision_radius)
-                
-                if entity.is_active:
+            if is_animal[kind]:
+                animals_count += 1
+                idx = entity._idx
+                food_sum += food[idx]
+                state = flags[idx]
+                if state & F_ACTIVE:
                     active_animals += 1
-                if entity.is_hungry:
+                if state & F_HUNGRY:
                     hungry_animals += 1
                 
-                # Статистика групп
-                if hasattr(entity, 'group') and entity.group:
-                    if species_name not in groups_by_species:
-                        groups_by_species[species_name] = set()
-                    groups_by_species[species_name].add(id(entity.group))
+                # Статистика групп по идентификаторам групп, как и в GUI
+                species_groups = groups_by_species.get(kind)
+                if species_groups is None:
+                    species_groups = groups_by_species[kind] = set()
+                species_groups.add(group_id[idx])
             
-            elif isinstance(entity, Plant):
-                stats['entities']['plants'] += 1
+            elif is_plant[kind]:
+                plants_count += 1
                 # Можно добавить проверку активности роста
-                if hasattr(entity, 'can_grow') and entity.can_grow(world.time.current_time):
-                    stats['plants_data']['growth_active'] += 1
+                if entity._growth_mask & time_bit:
+                    growth_active += 1
+        
+        stats['species_count'] = {
+            kinds[kind]._type_name: count
+            for kind, count in enumerate(kind_counts) if count
+        }
+        stats['entities']['animals'] = animals_count
+        stats['entities']['plants'] = plants_count
+        stats['plants_data']['growth_active'] = growth_active
         
-        # Вычисляем средние значения для животных
-        if animal_food_values:
-            stats['animals_data']['avg_food'] = sum(animal_food_values) / len(animal_food_values)
-        if animal_vision_values:
-            stats['animals_data']['avg_vision_radius'] = sum(animal_vision_values) / len(animal_vision_values)
+        # Вычисляем средние значения для животных; радиус обзора задается классом
+        if animals_count:
+            vision_sum = sum(kinds[kind].vision_radius * count
+                             for kind, count in enumerate(kind_counts) if is_animal[kind])
+            stats['animals_data']['avg_food'] = food_sum / animals_count
+            stats['animals_data']['avg_vision_radius'] = vision_sum / animals_count
         
         stats['animals_data']['active_count'] = active_animals
         stats['animals_data']['hungry_count'] = hungry_animals
         
         # Статистика групп
-        for species, group_ids in groups_by_species.items():
-            stats['animals_data']['group_stats'][species] = {
+        for kind, group_ids in groups_by_species.items():
+            stats['animals_data']['group_stats'][kinds[kind]._type_name] = {
                 'group_count': len(group_ids),
-                'individuals': stats['species_count'].get(species, 0)
+                'individuals': kind_counts[kind]
             }
         
+        # Индекс разнообразия считается один раз и переиспользуется при форматировании и экспорте
+        stats['_diversity'] = self.calculate_diversity_index(stats)
+        
         return stats
     
     def save_stats(self, stats: Dict[str, Any]):
         """Сохраняет статистику в историю"""
-        self.history.append(stats)
+        columns = self._columns
+        entities = stats['entities']
+        animals_data = stats['animals_data']
+        columns['tick'].append(stats['tick'])
+        columns['time'].append(DAY_TIMES.index(stats['time']))
+        columns['total'].append(entities['total'])
+        columns['plants'].append(entities['plants'])
+        columns['animals'].append(entities['animals'])
+        columns['growth_active'].append(stats['plants_data']['growth_active'])
+        columns['active_count'].append(animals_data['active_count'])
+        columns['hungry_count'].append(animals_data['hungry_count'])
+        columns['avg_food'].append(animals_data['avg_food'])
+        columns['avg_vision_radius'].append(animals_data['avg_vision_radius'])
+        columns['diversity'].append(self.calculate_diversity_index(stats))
+        
+        # Новый вид получает нули за все предыдущие тики
+        species_count = stats['species_count']
+        for species in species_count:
+            if species not in self._species_counts:
+                self._species_counts[species] = array('i', [0]) * self._n
+        for species, counts in self._species_counts.items():
+            counts.append(species_count.get(species, 0))
+        
+        group_stats = animals_data['group_stats']
+        for species in group_stats:
+            if species not in self._group_counts:
+                self._group_counts[species] = array('i', [0]) * self._n
+        for species, group_counts in self._group_counts.items():
+            group_data = group_stats.get(species)
+            group_counts.append(group_data['group_count'] if group_data else 0)
+        self._n += 1
     
     def get_population_trend(self, species: str, last_n_ticks: int = 10) -> List[int]:
         """Возвращает тренд популяции для указанного вида"""
-        if len(self.history) < 2:
+        if self._n < 2:
             return []
         
-        recent_history = self.history[-last_n_ticks:] if len(self.history) >= last_n_ticks else self.history
-        return [stat['species_count'].get(species, 0) for stat in recent_history]
+        counts = self._species_counts.get(species)
+        if counts is None:
+            return [0] * min(self._n, last_n_ticks)
+        return counts[-last_n_ticks:].tolist()
     
     def calculate_diversity_index(self, stats: Dict[str, Any]) -> float:
-        """Вычисляет индекс разнообразия Шеннона"""
+        """Вычисляет индекс разнообразия Шеннона (берет готовое значение, если оно уже посчитано)"""
+        diversity = stats.get('_diversity')
+        if diversity is not None:
+            return diversity
+        
         total = stats['entities']['total']
         if total <= 1:
             return 0.0
         
-        import math
+        log = math.log
         diversity = 0.0
         for count in stats['species_count'].values():
             if count > 0:
                 proportion = count / total
-                diversity -= proportion * math.log(proportion)
+                diversity -= proportion * log(proportion)
         
         return diversity
     
     def get_ecosystem_health(self, stats: Dict[str, Any]) -> str:
         """Оценивает здоровье экосистемы"""
-        total_entities = stats['entities']['total']
-        diversity = self.calculate_diversity_index(stats)
-        
+        return self._health(stats['entities']['total'], self.calculate_diversity_index(stats))
+    
+    @staticmethod
+    def _health(total_entities: int, diversity: float) -> str:
+        """Оценка здоровья по числу сущностей и индексу разнообразия"""
         if total_entities < 10:
             return "Critical"
         elif diversity < 1.0:
@@ -131,74 +277,79 @@ class EcosystemStats:
             return "Good"
     
     def format_detailed_stats(self, stats: Dict[str, Any]) -> str:
-        """Форматирует детальную статистику для отображения"""
-        text = f"=== Ecosystem Stats - Tick {stats['tick']} ===\n"
-        text += f"Time of Day: {stats['time']}\n"
-        text += f"Total Entities: {stats['entities']['total']}\n"
-        text += f"Diversity Index: {self.calculate_diversity_index(stats):.2f}\n"
-        text += f"Ecosystem Health: {self.get_ecosystem_health(stats)}\n\n"
-        
-        # Популяция по видам
-        text += "=== SPECIES POPULATION ===\n"
+        """Форматирует детальную статистику для отображения (один раз для каждого снимка)"""
+        text = stats.get('_formatted')
+        if text is not None:
+            return text
+        
+        entities = stats['entities']
+        animals_data = stats['animals_data']
+        lines = [
+            f"=== Ecosystem Stats - Tick {stats['tick']} ===",
+            f"Time of Day: {stats['time']}",
+            f"Total Entities: {entities['total']}",
+            f"Diversity Index: {self.calculate_diversity_index(stats):.2f}",
+            f"Ecosystem Health: {self.get_ecosystem_health(stats)}",
+            "",
+            # Популяция по видам
+            "=== SPECIES POPULATION ==="
+        ]
         for species, count in sorted(stats['species_count'].items()):
-            text += f"{species}: {count}\n"
+            lines.append(f"{species}: {count}")
         
-        text += f"\n=== PLANTS ({stats['entities']['plants']}) ===\n"
-        text += f"Growth Active: {stats['plants_data']['growth_active']}\n"
+        lines.append("")
+        lines.append(f"=== PLANTS ({entities['plants']}) ===")
+        lines.append(f"Growth Active: {stats['plants_data']['growth_active']}")
         
-        text += f"\n=== ANIMALS ({stats['entities']['animals']}) ===\n"
-        if stats['entities']['animals'] > 0:
-            text += f"Active: {stats['animals_data']['active_count']}\n"
-            text += f"Hungry: {stats['animals_data']['hungry_count']}\n"
-            text += f"Avg Food: {stats['animals_data']['avg_food']:.1f}\n"
-            text += f"Avg Vision Radius: {stats['animals_data']['avg_vision_radius']:.1f}\n"
+        lines.append("")
+        lines.append(f"=== ANIMALS ({entities['animals']}) ===")
+        if entities['animals'] > 0:
+            lines.append(f"Active: {animals_data['active_count']}")
+            lines.append(f"Hungry: {animals_data['hungry_count']}")
+            lines.append(f"Avg Food: {animals_data['avg_food']:.1f}")
+            lines.append(f"Avg Vision Radius: {animals_data['avg_vision_radius']:.1f}")
             
-            text += "\n=== GROUP STATISTICS ===\n"
-            for species, group_data in stats['animals_data']['group_stats'].items():
-                text += f"{species}: {group_data['group_count']} groups, "
-                text += f"{group_data['individuals']} individuals\n"
+            lines.append("")
+            lines.append("=== GROUP STATISTICS ===")
+            for species, group_data in animals_data['group_stats'].items():
+                lines.append(f"{species}: {group_data['group_count']} groups, "
+                             f"{group_data['individuals']} individuals")
         
+        lines.append("")
+        text = stats['_formatted'] = "\n".join(lines)
         return text
     
     def export_to_csv(self, filename: str):
         """Экспортирует статистику в CSV файл"""
-        import csv
-        
-        if not self.history:
+        if not self._n:
             return
         
+        species_order = sorted(self._species_counts)
         fieldnames = ['tick', 'time', 'total_entities', 'diversity_index', 'ecosystem_health']
-        
-        # Добавляем поля для каждого вида
-        all_species = set()
-        for stats in self.history:
-            all_species.update(stats['species_count'].keys())
-        
-        fieldnames.extend(sorted(all_species))
+        fieldnames.extend(species_order)
         fieldnames.extend(['active_animals', 'hungry_animals', 'avg_food', 'avg_vision'])
         
+        columns = self._columns
+        total = columns['total']
+        diversity = columns['diversity']
+        # Строки собираются из столбцов истории в порядке fieldnames
+        rows = zip(
+            columns['tick'],
+            [DAY_TIMES[time_idx] for time_idx in columns['time']],
+            total,
+            diversity,
+            map(self._health, total, diversity),
+            *[self._species_counts[species] for species in species_order],
+            columns['active_count'],
+            columns['hungry_count'],
+            columns['avg_food'],
+            columns['avg_vision_radius']
+        )
+        
         with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            
-            for stats in self.history:
-                row = {
-                    'tick': stats['tick'],
-                    'time': stats['time'],
-                    'total_entities': stats['entities']['total'],
-                    'diversity_index': self.calculate_diversity_index(stats),
-                    'ecosystem_health': self.get_ecosystem_health(stats),
-                    'active_animals': stats['animals_data']['active_count'],
-                    'hungry_animals': stats['animals_data']['hungry_count'],
-                    'avg_food': stats['animals_data']['avg_food'],
-                    'avg_vision': stats['animals_data']['avg_vision_radius']
-                }
-                
-                # Добавляем данные по видам
-                for species in all_species:
-                    row[species] = stats['species_count'].get(species, 0)
-                
-                writer.writerow(row)
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            writer.writerows(rows)
 
 # Глобальный экземпляр для удобства использования
 ecosystem_stats = EcosystemStats()
\ No newline at end of file
@@ -3,77 +3,16 @@ import unittest
 from meta import EcosystemRegistry
 from plants import Plant, Lumiere, Obscurite, Demi
 from animals import Animal, Malheureux, Pauvre
+from time_1 import TIME_DAY
+from world import World
 import random
 
-# Мок-класс для симуляции мира
-class World:
-    def __init__(self):
-        self.width = 10
-        self.height = 10
-        self.matrix = [[None for _ in range(self.width)] for _ in range(self.height)]
-        self.entities = []
-    
-    def add_entity(self, entity):
-        self.entities.append(entity)
-        x, y = entity.position
-        self.matrix[x][y] = entity
-    
-    def delete_unit(self, entity):
-        if entity in self.entities:
-            self.entities.remove(entity)
-            x, y = entity.position
-            self.matrix[x][y] = None
-    
-    def get_nearby_objects(self, position, radius):
-        x, y = position
-        nearby = []
-        for dx in range(-radius, radius+1):
-            for dy in range(-radius, radius+1):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.height and 0 <= ny < self.width:
-                    obj = self.matrix[nx][ny]
-                    if obj and obj.position != position:
-                        nearby.append(obj)
-        return nearby
-    
-    def get_free_adjacent_cells(self, position):
-        x, y = position
-        cells = []
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.height and 0 <= ny < self.width and self.matrix[nx][ny] is None:
-                    cells.append((nx, ny))
-        return cells
-    
-    def is_valid_position(self, x, y):
-        return 0 <= x < self.height and 0 <= y < self.width
-    
-    def relocate_unit(self, obj, new_pos):
-        old_x, old_y = obj.position
-        new_x, new_y = new_pos
-        
-        if self.is_valid_position(new_x, new_y) and self.matrix[new_x][new_y] is None:
-            self.matrix[old_x][old_y] = None
-            obj.position = [new_x, new_y]
-            self.matrix[new_x][new_y] = obj
-            return True
-        return False
-    
-    def remove_group(self, group):
-        for animal in group:
-            if animal in self.entities:
-                self.entities.remove(animal)
-                x, y = animal.position
-                self.matrix[x][y] = None
-
 
 class TestMetaclasses(unittest.TestCase):
     
     def setUp(self):
-        self.world = World()
+        # Тесты работают с настоящим миром, без пауз и вывода в консоль
+        self.world = World(width=10, height=10, max_ticks=0, verbose=False)
         random.seed(42)
     
     def test_registry(self):
@@ -101,6 +40,7 @@ class TestMetaclasses(unittest.TestCase):
         # Проверяем корректность методов
 
         self.assertFalse(plant.can_grow("night"))
+        self.assertTrue(plant.can_grow("day"))
     
     def test_animal_methods(self):
         """Тест автоматически сгенерированных методов для животных"""
@@ -119,6 +59,12 @@ class TestMetaclasses(unittest.TestCase):
         
         animal.change_active_status("night")
         self.assertFalse(animal.is_active)
+        
+        # Потомок создается того же класса на соседней клетке
+        self.world.add_entity(animal)
+        self.assertTrue(animal.reproduce(self.world))
+        self.assertEqual(len(self.world.entities), 2)
+        self.assertIsInstance(self.world.entities[1], Malheureux)
     
     def test_plant_behavior(self):
         """Тест поведения растений в разных режимах времени"""
@@ -132,7 +78,17 @@ class TestMetaclasses(unittest.TestCase):
         self.world.add_entity(obscurite)
         self.world.add_entity(demi)
         
-
+        # После трех неудачных попыток роста растение становится агрессивным
+        # через флаг, метод распространения не подменяется
+        obscurite.failed_growth_ticks = 3
+        obscurite.check_self_modification(TIME_DAY)
+        self.assertTrue(obscurite._is_aggressive)
+        self.assertNotIn("try_spread", getattr(obscurite, "__dict__", {}))
+        self.assertFalse(lumiere._is_aggressive)
+        
+        # Конкуренты разрешаются один раз на класс
+        self.assertEqual(lumiere.competitors, (Obscurite, Demi))
+        self.assertIs(Lumiere([1, 1]).competitors, lumiere.competitors)
     
     def test_animal_behavior(self):
         """Тест поведения животных в разных режимах времени"""
@@ -167,15 +123,105 @@ class TestMetaclasses(unittest.TestCase):
         
         # Создаем большую группу для проверки самомодификации
         for i in range(5):
-            member = Malheureux([5 + i, 5])
+            member = Malheureux([6, i])
             self.world.add_entity(member)
             malheureux.group.append(member)
             member.group = malheureux.group
         
         # Проверяем самомодификацию
-        self.assertFalse(hasattr(malheureux, "_is_predatory"))
+        self.assertFalse(malheureux._is_predatory)
         malheureux.check_self_modification()
-        self.assertTrue(hasattr(malheureux, "_is_predatory"))
+        self.assertTrue(malheureux._is_predatory)
+
+        # Агрессивное поедание включается флагом, метод класса не подменяется
+        pauvre = Pauvre([1, 1])
+        self.world.add_entity(pauvre)
+        pauvre.food = 5
+        pauvre.is_hungry = True
+        pauvre.check_self_modification()
+        self.assertTrue(pauvre._is_aggressive)
+        self.assertNotIn('eat', getattr(pauvre, '__dict__', {}))
+        
+        # Агрессивная особь ест растение Lumiere рядом с собой
+        prey = Lumiere([1, 2])
+        self.world.add_entity(prey)
+        for _ in range(100):
+            pauvre.eat(self.world, 0)
+            if not self.world.has_entity(prey):
+                break
+        self.assertFalse(self.world.has_entity(prey))
+        self.assertIsNone(self.world.entity_at(1, 2))
+        self.assertEqual(pauvre.food, 25)
+
+    def test_animal_store(self):
+        """Тест хранения состояния животных в общих массивах"""
+        pauvre = Pauvre([3, 4])
+        self.world.add_entity(pauvre)
+        store = self.world.store
+        idx = pauvre._idx
+        self.assertIs(pauvre._store, store)
+        self.assertEqual(store.kind[idx], Pauvre._kind)
+        self.assertEqual(pauvre.position, [3, 4])
+        
+        # Пересчет активности, голода и скорости для всех животных сразу
+        pauvre.food = 10
+        store.update_tick(0)
+        self.assertTrue(pauvre.is_hungry)
+        self.assertEqual(pauvre.speed, 50)
+        store.update_tick(3)
+        self.assertFalse(pauvre.is_active)
+        
+        self.world.delete_unit(pauvre)
+        self.assertEqual(store.kind[idx], -1)
+
+    def test_worlds_do_not_share_rows(self):
+        """Тест независимости состояния животных разных миров"""
+        pauvre = Pauvre([1, 1])
+        self.world.add_entity(pauvre)
+        pauvre.food = 77
+        
+        other = World(width=10, height=10, max_ticks=0, verbose=False)
+        malheureux = Malheureux([2, 2])
+        other.add_entity(malheureux)
+        self.assertIsNot(pauvre._store, malheureux._store)
+        self.assertEqual(pauvre.food, 77)
+        self.assertEqual(self.world.store.kind[pauvre._idx], Pauvre._kind)
+        
+        # Тик одного мира не трогает животных другого
+        other.process_tick()
+        self.assertEqual(pauvre.food, 77)
+        self.assertEqual(other.store.kind[malheureux._idx], Malheureux._kind)
+
+    def test_world_grid(self):
+        """Тест согласованности сетки мира при добавлении, перемещении и удалении"""
+        world = self.world
+        center = Lumiere([0, 0])
+        world.add_entity(center)
+        neighbours = [Demi(cell) for cell in ([0, 1], [1, 0], [1, 1])]
+        for plant in neighbours:
+            world.add_entity(plant)
+        
+        # Угловая клетка окружена со всех сторон - свободных соседей нет
+        self.assertIsNone(world.pick_free_adjacent_cell(center.position))
+        self.assertEqual(world.get_free_adjacent_cells(center.position), [])
+        
+        # Сущность не добавляется в занятую клетку
+        self.assertFalse(world.add_entity(Lumiere([0, 0])))
+        self.assertIs(world.entity_at(0, 0), center)
+        self.assertEqual(len(world.entities), 4)
+        
+        world.delete_unit(neighbours[0])
+        self.assertFalse(world.has_entity(neighbours[0]))
+        self.assertIsNone(world.entity_at(0, 1))
+        self.assertEqual(world.pick_free_adjacent_cell(center.position), (0, 1))
+        
+        animal = Pauvre([5, 5])
+        world.add_entity(animal)
+        self.assertTrue(world.move_entity(animal, [6, 5]))
+        self.assertIs(world.entity_at(6, 5), animal)
+        self.assertIsNone(world.entity_at(5, 5))
+        self.assertFalse(world.move_entity(animal, [10, 5]))
+        self.assertEqual(world.get_nearby_objects([6, 6], 1), [animal])
 
 
 if __name__ == "__main__":
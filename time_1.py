@@ -1,12 +1,39 @@
+# Времена суток как целые числа
+TIME_MORNING = 0
+TIME_DAY = 1
+TIME_EVENING = 2
+TIME_NIGHT = 3
+
+# Названия времен суток в порядке смены, индекс - числовое время суток
+DAY_TIMES = ("morning", "day", "evening", "night")
+
+# Бит каждого времени суток для масок вида "активно в эти времена"
+TIME_BITS = {day_time: 1 << time_idx for time_idx, day_time in enumerate(DAY_TIMES)}
+
+
 class Time:
+    __slots__ = ('cycle', 'current_time_idx', 'current_time', 'tick_counter')
+
     def __init__(self):
-        self.cycle = ["morning", "day", "evening", "night"]
-        self.current_time = self.cycle[0]
+        self.cycle = DAY_TIMES
+        self.current_time_idx = TIME_MORNING
+        self.current_time = self.cycle[self.current_time_idx]
         self.tick_counter = 0
 
     def change_time(self):
         self.tick_counter += 1
-        self.current_time = self.cycle[self.tick_counter % len(self.cycle)]
+        # Времен суток четыре, поэтому следующий индекс берется маской вместо деления
+        self.current_time_idx = (self.current_time_idx + 1) & 3
+        self.current_time = self.cycle[self.current_time_idx]
+
+    def set_time_idx(self, time_idx: int):
+        """Устанавливает время суток по его числовому индексу"""
+        self.current_time_idx = time_idx
+        self.current_time = self.cycle[time_idx]
+        self.tick_counter = time_idx
 
     def get_time(self):
-        return self.current_time
\ No newline at end of file
+        return self.current_time
+
+    def get_time_id(self) -> int:
+        return self.current_time_idx
@@ -1,19 +1,50 @@
 import random
-from typing import List, Type
+from typing import Dict, List, Optional, Tuple, Type
 from time import sleep
 from animals import *
 from plants import *
 from time_1 import Time
+from animal_store import AnimalStore
 
+# Смещения соседних клеток в порядке обхода
+_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1))
+
+# Символы для вывода мира в консоль; пустая клетка хранит None
+_SYMBOLS = {
+    Malheureux: 'M',
+    Pauvre: 'P',
+    Lumiere: '☀',
+    Obscurite: '🌙',
+    Demi: '🌓',
+    type(None): '·'
+}
 
 class World:
-    def __init__(self, width: int, height: int, max_ticks: int):
+    def __init__(self, width: int, height: int, max_ticks: int,
+                 tick_delay: float = 0.0, verbose: bool = True):
         self.width = width
         self.height = height
         self.max_ticks = max_ticks
-        self.matrix = [[None for _ in range(width)] for _ in range(height)]
+        # Пауза между тиками в секундах для просмотра в консоли; 0 - без пауз
+        self.tick_delay = tick_delay
+        # Печать состояния мира на каждом тике
+        self.verbose = verbose
+        # Сетка мира хранится одним плоским списком: клетка (x, y) лежит
+        # по индексу x * width + y
+        self.matrix: List[Optional[object]] = [None] * (width * height)
+        # Число занятых клеток в каждой строке: пустые строки пропускаются при поиске соседей
+        self._row_counts: List[int] = [0] * height
+        # Соседи каждой клетки в пределах мира: (x, y, индекс в matrix)
+        self._adjacent: List[Tuple[Tuple[int, int, int], ...]] = self._build_adjacency()
+        # Число свободных соседей каждой клетки: в плотном мире большинство
+        # запросов свободной клетки отвечается без обхода соседей
+        self._free_adjacent: List[int] = [len(cells) for cells in self._adjacent]
         self.entities: List[object] = []
+        # Позиция каждой сущности в self.entities для удаления за O(1)
+        self._entity_index: Dict[object, int] = {}
         self.time = Time()
+        # Собственное хранилище состояния животных: миры не делят строки
+        self.store = AnimalStore()
         
         # Конфигурация начальной популяции
         self.initial_population = {
@@ -26,109 +57,213 @@ class World:
     def remove_group(self, group: List[Animal]):
         # Удаляем группу из общего списка
         for animal in group:
-            if animal in self.entities:
-                self.entities.remove(animal)
-                x, y = animal.position
-                self.matrix[x][y] = None
+            if self._detach(animal):
+                self._clear(*animal.position)
+                self.store.release(animal._idx)
+
+    def _detach(self, entity: object) -> bool:
+        """Убирает сущность из списка за O(1), ставя на ее место последнюю"""
+        index = self._entity_index.pop(entity, None)
+        if index is None:
+            return False
+        last = self.entities.pop()
+        if last is not entity:
+            self.entities[index] = last
+            self._entity_index[last] = index
+        return True
+
+    def _build_adjacency(self) -> List[Tuple[Tuple[int, int, int], ...]]:
+        """Строит таблицу соседних клеток один раз, чтобы не проверять границы при каждом вызове"""
+        width = self.width
+        height = self.height
+        return [
+            tuple((x + dx, y + dy, (x + dx) * width + y + dy) for dx, dy in _NEIGHBOURS
+                  if 0 <= x + dx < height and 0 <= y + dy < width)
+            for x in range(height) for y in range(width)
+        ]
+
+    def has_entity(self, entity: object) -> bool:
+        return entity in self._entity_index
 
     def get_nearby_objects(self, position: List[int], radius: int) -> List[object]:
         x, y = position
+        width = self.width
+        matrix = self.matrix
+        # Берем срезы строк плоской сетки в пределах границ вместо проверки
+        # каждой клетки; начало строки сдвигается на width
+        y_start = max(0, y - radius)
+        y_stop = min(width, y + radius + 1)
+        center = matrix[x * width + y] if 0 <= x < self.height and 0 <= y < width else None
+        row_counts = self._row_counts
         nearby = []
-        for dx in range(-radius, radius+1):
-            for dy in range(-radius, radius+1):
-                if 0 <= x+dx < self.height and 0 <= y+dy < self.width:
-                    obj = self.matrix[x+dx][y+dy]
-                    if obj and (dx != 0 or dy != 0):
-                        nearby.append(obj)
+        for row in range(max(0, x - radius), min(self.height, x + radius + 1)):
+            if not row_counts[row]:
+                continue
+            base = row * width
+            for obj in matrix[base + y_start:base + y_stop]:
+                if obj is not None and obj is not center:
+                    nearby.append(obj)
         return nearby
     
+
+    def _place(self, x: int, y: int, entity: object):
+        """Ставит сущность в клетку и обновляет счетчики занятости"""
+        cell = x * self.width + y
+        self.matrix[cell] = entity
+        self._row_counts[x] += 1
+        free_adjacent = self._free_adjacent
+        for _, _, neighbour in self._adjacent[cell]:
+            free_adjacent[neighbour] -= 1
+
+    def _clear(self, x: int, y: int):
+        """Освобождает клетку и обновляет счетчики занятости"""
+        cell = x * self.width + y
+        self.matrix[cell] = None
+        self._row_counts[x] -= 1
+        free_adjacent = self._free_adjacent
+        for _, _, neighbour in self._adjacent[cell]:
+            free_adjacent[neighbour] += 1
+
     def is_valid_position(self, x: int, y: int) -> bool:
         return 0 <= x < self.height and 0 <= y < self.width
 
+    def entity_at(self, x: int, y: int) -> Optional[object]:
+        """Возвращает сущность в клетке (x, y) или None"""
+        return self.matrix[x * self.width + y]
 
-    def add_entity(self, new_entity: Type, count: int = 1):
-        self.matrix[new_entity.position[0]][new_entity.position[1]] = new_entity
+
+    def add_entity(self, new_entity: Type, count: int = 1) -> bool:
+        x, y = new_entity.position
+        # Занятая клетка не перезаписывается, иначе разойдутся счетчики занятости
+        if self.matrix[x * self.width + y] is not None:
+            return False
+        # Состояние животного переносится в хранилище этого мира
+        if isinstance(new_entity, Animal) and new_entity._store is not self.store:
+            self.store.adopt(new_entity)
+        self._place(x, y, new_entity)
+        self._entity_index[new_entity] = len(self.entities)
         self.entities.append(new_entity)
+        return True
         
 
+    def reset_entities(self, entities: List[object]):
+        """Заменяет все сущности мира, очищая матрицу на месте"""
+        matrix = self.matrix
+        matrix[:] = [None] * len(matrix)
+        self._row_counts = [0] * self.height
+        self._free_adjacent = [len(cells) for cells in self._adjacent]
+        
+        self.entities = list(entities)
+        self._entity_index = {entity: index for index, entity in enumerate(self.entities)}
+        for entity in self.entities:
+            self._place(*entity.position, entity)
+
     def delete_unit(self, entity: object):
-        if entity in self.entities:
-            x, y = entity.position
-            self.matrix[x][y] = None
-            self.entities.remove(entity)
+        if self._detach(entity):
+            self._clear(*entity.position)
+            if isinstance(entity, Animal):
+                self.store.release(entity._idx)
 
     def move_entity(self, entity: object, new_pos: List[int]):
-        old_x, old_y = entity.position
         new_x, new_y = new_pos
         
-        if self.is_valid_position(new_x, new_y) and self.matrix[new_x][new_y] is None:
-            self.matrix[old_x][old_y] = None
+        # Проверка границ встроена: метод вызывается на каждый шаг животного
+        width = self.width
+        if not (0 <= new_x < self.height and 0 <= new_y < width):
+            return False
+        if self.matrix[new_x * width + new_y] is None:
+            self._clear(*entity.position)
             entity.position = [new_x, new_y]
-            self.matrix[new_x][new_y] = entity
+            self._place(new_x, new_y, entity)
             return True
         return False
     
     def relocate_unit(self, obj: object, new_pos: List[int]):
             success = self.move_entity(obj, new_pos)
-            if success:
-                logger.log_console(f"{obj.__class__.__name__} переместился на {new_pos}")
+            if success and logger.enabled:
+                logger.log_console("%s переместился на %s", obj._type_name, new_pos)
             return success
     
     def process_tick(self):
-        current_time = self.time.get_time()
+        time_idx = self.time.current_time_idx
+        store = self.store
+        store.recycle()
+        store.update_tick(time_idx)
         
+        entity_index = self._entity_index
         for entity in list(self.entities):
-            entity.update_state(self, current_time)
+            # Сущность, удаленная ранее в этом тике, больше не действует
+            if entity in entity_index:
+                entity.update_state(self, time_idx)
                 
         self.time.change_time()
 
-    def initial_spawn(self, entity_class: Type, count: int = 1):
-        for _ in range(count):
-            while True:
-                x = random.randint(0, self.height-1)
-                y = random.randint(0, self.width-1)
-                if self.matrix[x][y] is None:
-                    entity = entity_class([x, y])
-                    self.matrix[x][y] = entity
-                    self.entities.append(entity)
-                    break
+    def _shuffled_free_cells(self) -> List[Tuple[int, int]]:
+        """Возвращает свободные клетки мира в случайном порядке"""
+        width = self.width
+        matrix = self.matrix
+        cells = [divmod(cell, width) for cell in range(len(matrix)) if matrix[cell] is None]
+        random.shuffle(cells)
+        return cells
+
+    def initial_spawn(self, entity_class: Type, count: int = 1,
+                      free_cells: Optional[List[Tuple[int, int]]] = None):
+        # Клетки берутся из перемешанного списка свободных без повторных попыток;
+        # если мир заполнен, лишние сущности не создаются
+        if free_cells is None:
+            free_cells = self._shuffled_free_cells()
+        for _ in range(min(count, len(free_cells))):
+            x, y = free_cells.pop()
+            self.add_entity(entity_class([x, y]))
 
     def initialize_ecosystem(self):
+        free_cells = self._shuffled_free_cells()
         for entity_class, count in self.initial_population.items():
-            self.initial_spawn(entity_class, count)
+            self.initial_spawn(entity_class, count, free_cells)
 
     def run_simulation(self):
         self.initialize_ecosystem()
         
+        # Настройки и методы цикла читаются один раз до начала тиков
+        verbose = self.verbose
+        tick_delay = self.tick_delay
+        time = self.time
+        process_tick = self.process_tick
+        print_world_state = self.print_world_state
         for tick in range(self.max_ticks):
-            print(f"\n=== Tick {tick+1} ===")
-            print(f"Current time: {self.time.current_time}")
-            self.print_world_state()
-            self.process_tick()
-            sleep(1)
+            if verbose:
+                print(f"\n=== Tick {tick+1} ===")
+                print(f"Current time: {time.current_time}")
+                print_world_state()
+            process_tick()
+            if tick_delay:
+                sleep(tick_delay)
 
     def print_world_state(self):
-        symbols = {
-            Malheureux: 'M',
-            Pauvre: 'P',
-            Lumiere: '☀',
-            Obscurite: '🌙',
-            Demi: '🌓',
-            None: '·'
-        }
-        
-        for row in self.matrix:
-            print(' '.join([symbols[type(obj)] if obj else symbols[None] for obj in row]))
+        symbols = _SYMBOLS
+        matrix = self.matrix
+        width = self.width
+        # Весь кадр собирается в одну строку и выводится одним вызовом print
+        print('\n'.join([
+            ' '.join([symbols[type(obj)] for obj in matrix[base:base + width]])
+            for base in range(0, len(matrix), width)
+        ]))
+
 
+    def pick_free_adjacent_cell(self, position: List[int]) -> Optional[Tuple[int, int]]:
+        """Выбирает случайную свободную соседнюю клетку или None, если свободных нет"""
+        x, y = position
+        center = x * self.width + y
+        if not self._free_adjacent[center]:
+            return None
+        matrix = self.matrix
+        cells = [(nx, ny) for nx, ny, cell in self._adjacent[center] if matrix[cell] is None]
+        return random.choice(cells)
 
     def get_free_adjacent_cells(self, position: List[int]) -> List[Tuple[int, int]]:
         x, y = position
-        cells = []
-        for dx in [-1, 0, 1]:
-            for dy in [-1, 0, 1]:
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if self.is_valid_position(nx, ny) and self.matrix[nx][ny] is None:
-                    cells.append((nx, ny))
-        return cells
+        center = x * self.width + y
+        if not self._free_adjacent[center]:
+            return []
+        matrix = self.matrix
+        return [(nx, ny) for nx, ny, cell in self._adjacent[center] if matrix[cell] is None]